@@ -1,24 +1,26 @@
+import os
 import sys
+import argparse
 import json
 import csv
 from dataclasses import dataclass
-from typing import List, Tuple, Dict, Optional, Set
+from typing import List, Tuple, Dict, Optional
 from pathlib import Path
 import logging
+import mmap
+import multiprocessing as mp
 from enum import Enum
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+import numpy as np
+import pandas as pd
+from numba import njit
 
 class Sex(Enum):
     MALE = 'Male'
     FEMALE = 'Female'
     UNKNOWN = 'Unknown'
 
-@dataclass
+@dataclass(slots=True)
 class GenomicRegion:
     chromosome: str
     start: int
@@ -34,142 +36,372 @@ class GenomicRegion:
     def confidence(self) -> float:
         return (self.homozygous_count / self.total_count * 100) if self.total_count > 0 else 0
 
+_TAB = 9
+_NEWLINE = 10
+_CR = 13
+_SPACE = 32
+_PERCENT = 37
+_DOT = 46
+_ZERO = 48
+_NINE = 57
+_X = 88
+
+@njit(cache=True)
+def _grow(table):
+    """Return a copy of a 2-D output table with twice as many rows."""
+    grown = np.empty((2 * table.shape[0], table.shape[1]), dtype=table.dtype)
+    grown[:table.shape[0]] = table
+    return grown
+
+@njit(cache=True)
+def _same_bytes(buf, start, end, other, other_start, other_end):
+    """Check whether buf[start:end] equals other[other_start:other_end]."""
+    if end - start != other_end - other_start:
+        return False
+    for j in range(end - start):
+        if buf[start + j] != other[other_start + j]:
+            return False
+    return True
+
+@njit(cache=True)
+def _emit_region(
+    regions, count, start, end, hc, tc, hc_left, tc_left, block, centromere, excluded,
+    min_streak, min_size, hc_threshold, conf_threshold
+):
+    """Append a closed region to the output table if it passes the filters."""
+    spans_centromere = start < centromere < end
+    if (hc >= min_streak and end - start + 1 >= min_size and not excluded
+            and (spans_centromere or (hc > hc_threshold and hc / tc * 100 > conf_threshold))):
+        if count == regions.shape[0]:
+            regions = _grow(regions)
+        regions[count, 0] = start
+        regions[count, 1] = end
+        regions[count, 2] = hc
+        regions[count, 3] = tc
+        regions[count, 4] = block
+        regions[count, 5] = hc_left
+        regions[count, 6] = tc_left
+        count += 1
+    return regions, count
+
+@njit(cache=True)
+def scan_cns(
+    buf, chrom_names, chrom_offsets, centromeres, half_width, max_gap,
+    min_streak, min_size, hc_threshold, conf_threshold
+):
+    """Parse a raw CNS file buffer and scan it for LOH regions in a single pass.
+
+    Returns (regions, blocks). Each regions row is (start, end, homozygous_count,
+    total_count, block, homozygous_left, total_left), where the *_left counts cover
+    the positions before the chromosome's centromere; each blocks row describes a
+    run of lines on one chromosome as (name_start, name_end, rows, het_rows,
+    chrom_code), with the name as offsets into buf.
+
+    A position is homozygous when its VarFreq lies at least half_width away from 50%.
+    Homozygous positions on the same chromosome are joined while no more than
+    max_gap heterozygous positions separate them; a region extends over trailing
+    heterozygous positions up to the one that closes it.
+
+    Only regions with at least min_streak homozygous positions, a size of at least
+    min_size and no 'X' in their chromosome name are emitted. Regions must also
+    have more than hc_threshold homozygous positions and a confidence above
+    conf_threshold percent, unless they span their chromosome's centromere, in which
+    case the thresholds apply to the pieces after splitting. Chromosome codes index
+    centromeres (-1 for none) and are resolved by name against chrom_names, which
+    holds the names concatenated and delimited by chrom_offsets; unknown names get -1.
+    """
+    n = len(buf)
+    regions = np.empty((64, 7), dtype=np.int64)
+    blocks = np.empty((64, 5), dtype=np.int64)
+    n_regions = 0
+    n_blocks = 0
+
+    centromere = -1
+    excluded = False
+    rows = 0
+    het_rows = 0
+    cur_start = 0
+    cur_end = 0
+    hc = 0
+    tc = 0
+    hc_left = 0
+    tc_left = 0
+    gap = 0
+
+    # Skip header
+    i = 0
+    while i < n and buf[i] != _NEWLINE:
+        i += 1
+    i += 1
+
+    while i < n:
+        if buf[i] == _NEWLINE:
+            i += 1
+            continue
+
+        # Chromosome (column 1); a new block starts whenever it differs from the previous line
+        name_start = i
+        while i < n and buf[i] != _TAB and buf[i] != _NEWLINE:
+            i += 1
+        name_end = i
+        if n_blocks == 0 or not _same_bytes(
+            buf, name_start, name_end, buf, blocks[n_blocks - 1, 0], blocks[n_blocks - 1, 1]
+        ):
+            if tc > 0:
+                regions, n_regions = _emit_region(
+                    regions, n_regions, cur_start, cur_end, hc, tc, hc_left, tc_left, n_blocks - 1, centromere,
+                    excluded, min_streak, min_size, hc_threshold, conf_threshold
+                )
+                tc = 0
+            if n_blocks > 0:
+                blocks[n_blocks - 1, 2] = rows
+                blocks[n_blocks - 1, 3] = het_rows
+
+            code = -1
+            for k in range(len(chrom_offsets) - 1):
+                if _same_bytes(buf, name_start, name_end, chrom_names, chrom_offsets[k], chrom_offsets[k + 1]):
+                    code = k
+                    break
+            if n_blocks == blocks.shape[0]:
+                blocks = _grow(blocks)
+            blocks[n_blocks, 0] = name_start
+            blocks[n_blocks, 1] = name_end
+            blocks[n_blocks, 4] = code
+            n_blocks += 1
+            rows = 0
+            het_rows = 0
+            centromere = centromeres[code] if code >= 0 else -1
+            excluded = False
+            for j in range(name_start, name_end):
+                if buf[j] == _X:
+                    excluded = True
+                    break
+        elif tc > 0 and gap > max_gap:
+            regions, n_regions = _emit_region(
+                regions, n_regions, cur_start, cur_end, hc, tc, hc_left, tc_left, n_blocks - 1, centromere,
+                excluded, min_streak, min_size, hc_threshold, conf_threshold
+            )
+            tc = 0
+
+        # Position (column 2)
+        i += 1
+        pos = 0
+        digits_start = i
+        while i < n and _ZERO <= buf[i] <= _NINE:
+            pos = pos * 10 + (buf[i] - _ZERO)
+            i += 1
+        if i == digits_start or i < n and buf[i] != _TAB and buf[i] != _NEWLINE:
+            raise ValueError("Malformed Position column in CNS file")
+        if i == n or buf[i] != _TAB:
+            raise ValueError("CNS line has fewer than 7 columns")
+
+        # Skip to VarFreq (column 7)
+        for _ in range(4):
+            i += 1
+            while i < n and buf[i] != _TAB and buf[i] != _NEWLINE:
+                i += 1
+            if i == n or buf[i] != _TAB:
+                raise ValueError("CNS line has fewer than 7 columns")
+        i += 1
+
+        # VarFreq as digits with an optional fraction, padded with spaces and optionally
+        # followed by '%', the forms float(var_freq.strip('%')) accepts
+        while i < n and buf[i] == _SPACE:
+            i += 1
+        mantissa = 0
+        scale = 1.0
+        digits = 0
+        while i < n and _ZERO <= buf[i] <= _NINE:
+            mantissa = mantissa * 10 + (buf[i] - _ZERO)
+            digits += 1
+            i += 1
+        if i < n and buf[i] == _DOT:
+            i += 1
+            while i < n and _ZERO <= buf[i] <= _NINE:
+                mantissa = mantissa * 10 + (buf[i] - _ZERO)
+                scale *= 10.0
+                digits += 1
+                i += 1
+        while i < n and buf[i] == _SPACE:
+            i += 1
+        if i < n and buf[i] == _PERCENT:
+            i += 1
+        if digits == 0 or i < n and buf[i] != _TAB and buf[i] != _NEWLINE and buf[i] != _CR:
+            raise ValueError("Malformed VarFreq column in CNS file")
+        var_freq = mantissa / scale
+
+        # Skip the rest of the line
+        while i < n and buf[i] != _NEWLINE:
+            i += 1
+        i += 1
+
+        rows += 1
+        if abs(var_freq - 50.0) >= half_width:
+            if tc == 0:
+                cur_start = pos
+                hc = 0
+                hc_left = 0
+                tc_left = 0
+            cur_end = pos
+            hc += 1
+            tc += 1
+            gap = 0
+        else:
+            het_rows += 1
+            if tc > 0:
+                cur_end = pos
+                tc += 1
+                gap += 1
+        # Track the counts up to the centromere so split pieces get their actual counts
+        if tc > 0 and pos < centromere:
+            hc_left = hc
+            tc_left = tc
+
+    if tc > 0:
+        regions, n_regions = _emit_region(
+            regions, n_regions, cur_start, cur_end, hc, tc, hc_left, tc_left, n_blocks - 1, centromere,
+            excluded, min_streak, min_size, hc_threshold, conf_threshold
+        )
+    if n_blocks > 0:
+        blocks[n_blocks - 1, 2] = rows
+        blocks[n_blocks - 1, 3] = het_rows
+
+    return regions[:n_regions], blocks[:n_blocks]
+
+@dataclass(slots=True)
+class CentromereTable:
+    """Centromere positions indexed by chromosome code, -1 where there is none.
+
+    The chromosome with code k is named names[offsets[k]:offsets[k + 1]] (UTF-8 bytes).
+    """
+    names: np.ndarray
+    offsets: np.ndarray
+    positions: np.ndarray
+
+@dataclass(slots=True)
+class BedIntervals:
+    """Gene intervals of one chromosome as parallel arrays sorted by start, with the longest interval length."""
+    starts: np.ndarray
+    ends: np.ndarray
+    genes: np.ndarray
+    max_length: int
+
 class LOHAnalyzer:
+    # Largest regions x intervals overlap matrix built per chromosome before
+    # find_all_affected_genes falls back to per-region binary search
+    MAX_OVERLAP_MATRIX = 10_000_000
+
     def __init__(
         self,
         min_streak: int = 5,
         loh_threshold: float = 35.0,
         min_region_size: int = 1_000_000,
         max_gap: int = 2,
-        sex_determination_threshold: float = 0.2
+        sex_determination_threshold: float = 0.2,
+        homozygous_count_threshold: int = 40,
+        confidence_threshold: float = 90.0
     ):
         self.min_streak = min_streak
         self.loh_threshold = loh_threshold
         self.min_region_size = min_region_size
         self.max_gap = max_gap
         self.sex_determination_threshold = sex_determination_threshold
+        self.homozygous_count_threshold = homozygous_count_threshold
+        self.confidence_threshold = confidence_threshold
+        # Homozygous iff var_freq <= loh_threshold or var_freq >= 100 - loh_threshold
+        self._half_width = 50.0 - loh_threshold
         
-    def _process_position(
-        self, 
-        chrom: str, 
-        pos: int, 
-        var_freq: float,
-        current_region: Optional[GenomicRegion],
-        gap_count: int,
-        regions: List[GenomicRegion]
-    ) -> Tuple[Optional[GenomicRegion], int]:
-        """Process a single genomic position and update LOH regions."""
-        is_homozygous = self._is_homozygous(var_freq)
-        
-        # Handle chromosome change
-        if current_region and current_region.chromosome != chrom:
-            if current_region:
-                regions.append(current_region)
-            current_region = None
-            gap_count = 0
-        
-        # Process homozygous position
-        if is_homozygous:
-            if current_region is None:
-                current_region = GenomicRegion(chrom, pos, pos, 1, 1)
-            else:
-                current_region = GenomicRegion(
-                    chrom,
-                    current_region.start,
-                    pos,
-                    current_region.homozygous_count + 1,
-                    current_region.total_count + 1
-                )
-            gap_count = 0
-        
-        # Process heterozygous position
-        else:
-            if current_region is not None:
-                gap_count += 1
-                current_region = GenomicRegion(
-                    chrom,
-                    current_region.start,
-                    pos,
-                    current_region.homozygous_count,
-                    current_region.total_count + 1
-                )
-                
-                # Close region if gap is too large
-                if gap_count > self.max_gap:
-                    regions.append(current_region)
-                    current_region = None
-                    gap_count = 0
-        
-        return current_region, gap_count
-
     @staticmethod
-    def load_centromeres(json_path: Path) -> Dict[str, int]:
-        """Load centromere positions from JSON file."""
+    def load_centromeres(json_path: Path) -> CentromereTable:
+        """Load centromere positions from JSON file, indexed by chromosome code."""
         try:
             with open(json_path) as f:
                 data = json.load(f)
-            return {k: v['centromere'] for k, v in data.items()}
+            names = [name.encode() for name in data]
+            return CentromereTable(
+                np.frombuffer(b''.join(names), dtype=np.uint8),
+                np.cumsum([0] + [len(name) for name in names], dtype=np.int64),
+                np.array([v['centromere'] or -1 for v in data.values()], dtype=np.int64)
+            )
         except Exception as e:
             logging.error(f"Failed to load centromeres file: {e}")
             raise
 
     @staticmethod
-    def load_bed_regions(bed_path: Path) -> Dict[str, List[Tuple[int, int, str]]]:
-        """Load gene regions from BED file."""
-        regions = {}
+    def load_bed_regions(bed_path: Path) -> Dict[str, BedIntervals]:
+        """Load gene regions from BED file and index them per chromosome."""
         try:
-            with open(bed_path) as f:
-                for line in f:
-                    chrom, start, end, gene = line.strip().split('\t')
-                    chrom = f"chr{chrom}" if not chrom.startswith('chr') else chrom
-                    regions.setdefault(chrom, []).append((int(start), int(end), gene))
-            return regions
+            df = pd.read_csv(
+                bed_path,
+                sep='\t',
+                header=None,
+                usecols=[0, 1, 2, 3],
+                names=['chrom', 'start', 'end', 'gene'],
+                dtype={'chrom': str, 'start': np.int32, 'end': np.int32, 'gene': str},
+                engine='c'
+            )
+            chroms = df['chrom']
+            df['chrom'] = chroms.where(chroms.str.startswith('chr'), 'chr' + chroms)
+            df = df.sort_values(['chrom', 'start', 'end', 'gene'])
+
+            index = {}
+            for chrom, group in df.groupby('chrom', sort=False):
+                starts = group['start'].to_numpy(np.int32)
+                ends = group['end'].to_numpy(np.int32)
+                index[chrom] = BedIntervals(
+                    starts,
+                    ends,
+                    group['gene'].to_numpy(object),
+                    int((ends - starts).max())
+                )
+            return index
         except Exception as e:
             logging.error(f"Failed to load BED file: {e}")
             raise
 
-    def _is_homozygous(self, var_freq: float) -> bool:
-        """Determine if a variant frequency indicates homozygosity."""
-        return var_freq <= self.loh_threshold or var_freq >= (100 - self.loh_threshold)
+    def analyze_file(self, file_path: Path, centromeres: CentromereTable) -> Tuple[List[GenomicRegion], Sex]:
+        """Analyze a CNS file for LOH regions and determine sample sex.
 
-    def analyze_file(self, file_path: Path, centromeres: Dict[str, int]) -> Tuple[List[GenomicRegion], Sex]:
-        """Analyze a CNS file for LOH regions and determine sample sex."""
-        regions: List[GenomicRegion] = []
-        current_region: Optional[GenomicRegion] = None
-        gap_count = 0
-        chrX_stats = {'het': 0, 'total': 0}
-        
-        try:
-            with open(file_path) as f:
-                next(f)  # Skip header
-                for line in f:
-                    chrom, pos, *_, var_freq = line.strip().split('\t')[:7]
-                    pos = int(pos)
-                    var_freq = float(var_freq.strip('%'))
-                    
-                    # Track chrX heterozygosity
-                    if chrom == 'chrX':
-                        chrX_stats['total'] += 1
-                        if not self._is_homozygous(var_freq):
-                            chrX_stats['het'] += 1
-                    
-                    # Process LOH regions
-                    current_region, gap_count = self._process_position(
-                        chrom, pos, var_freq, current_region, gap_count, regions
+        The returned regions are ready to report: regions on chromosomes with 'X' in
+        their name are dropped, centromere-spanning regions are split, and every region
+        has more than homozygous_count_threshold homozygous positions and a confidence
+        above confidence_threshold.
+        """
+        # Parse straight from the page cache; buf must be gone before the mapping closes
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"Empty CNS file: {file_path}")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                buf = np.frombuffer(mm, dtype=np.uint8)
+                try:
+                    region_table, blocks = scan_cns(
+                        buf, centromeres.names, centromeres.offsets, centromeres.positions,
+                        self._half_width, self.max_gap,
+                        self.min_streak, self.min_region_size,
+                        self.homozygous_count_threshold, self.confidence_threshold
                     )
-            
-            # Add the last region if it exists
-            if current_region:
-                regions.append(current_region)
-            
-            # Determine sex
-            sex = self._determine_sex(chrX_stats['het'], chrX_stats['total'])
-            
-            return self._filter_regions(regions, centromeres), sex
-            
-        except Exception as e:
-            logging.error(f"Error processing file {file_path}: {e}")
-            raise
+                    # Decode each distinct chromosome name once; unsorted files repeat names across blocks
+                    interned: Dict[bytes, str] = {}
+                    block_names = []
+                    for start, end in blocks[:, :2].tolist():
+                        raw = buf[start:end].tobytes()
+                        if raw not in interned:
+                            interned[raw] = raw.decode()
+                        block_names.append(interned[raw])
+                finally:
+                    del buf
+
+        # Determine sex from chrX heterozygosity
+        x_blocks = blocks[[name == 'chrX' for name in block_names]]
+        sex = self._determine_sex(int(x_blocks[:, 3].sum()), int(x_blocks[:, 2].sum()))
+        
+        # Unknown chromosomes have code -1, which picks the trailing -1 sentinel
+        region_blocks = region_table[:, 4]
+        centromere_pos = np.append(centromeres.positions, -1)[blocks[region_blocks, 4]]
+        region_names = [block_names[block] for block in region_blocks.tolist()]
+        return self._filter_regions(region_table, region_names, centromere_pos), sex
 
     def _determine_sex(self, het_count: int, total_count: int) -> Sex:
         """Determine sample sex based on X chromosome heterozygosity."""
@@ -178,107 +410,194 @@ class LOHAnalyzer:
         ratio = het_count / total_count
         return Sex.FEMALE if ratio > self.sex_determination_threshold else Sex.MALE
 
-    def _filter_regions(self, regions: List[GenomicRegion], centromeres: Dict[str, int]) -> List[GenomicRegion]:
-        """Filter and split regions based on size and centromere positions."""
+    def _passes_thresholds(self, region: GenomicRegion) -> bool:
+        """Check a region against the homozygous count and confidence thresholds."""
+        return (region.homozygous_count > self.homozygous_count_threshold and
+                region.confidence > self.confidence_threshold)
+
+    def _filter_regions(
+        self,
+        region_table: np.ndarray,
+        region_names: List[str],
+        centromere_pos: np.ndarray
+    ) -> List[GenomicRegion]:
+        """Build regions from the scanner output, splitting those that span their centromere
+        and keeping only the pieces that pass the thresholds.
+
+        region_table holds the rows returned by scan_cns, which has already applied the
+        thresholds to every region that does not span its centromere.
+        """
+        spans_centromere = (region_table[:, 0] < centromere_pos) & (centromere_pos < region_table[:, 1])
         filtered_regions = []
-        for region in regions:
-            if (region.homozygous_count >= self.min_streak and 
-                region.size >= self.min_region_size):
-                centromere_pos = centromeres.get(region.chromosome)
-                if centromere_pos and region.start < centromere_pos < region.end:
-                    # Split region at centromere
-                    filtered_regions.extend([
-                        GenomicRegion(
-                            region.chromosome, region.start, centromere_pos - 1,
-                            region.homozygous_count // 2, region.total_count // 2
-                        ),
-                        GenomicRegion(
-                            region.chromosome, centromere_pos, region.end,
-                            region.homozygous_count // 2, region.total_count // 2
-                        )
-                    ])
-                else:
-                    filtered_regions.append(region)
+        for (start, end, hc, tc, _, hc_left, tc_left), name, split, centromere in zip(
+            region_table.tolist(), region_names, spans_centromere.tolist(), centromere_pos.tolist()
+        ):
+            if not split:
+                filtered_regions.append(GenomicRegion(name, start, end, hc, tc))
+                continue
+            # Split region at centromere, with the counts the scanner took on either side
+            pieces = [
+                GenomicRegion(name, start, centromere - 1, hc_left, tc_left),
+                GenomicRegion(name, centromere, end, hc - hc_left, tc - tc_left)
+            ]
+            filtered_regions.extend(piece for piece in pieces if self._passes_thresholds(piece))
         return filtered_regions
 
-    def find_affected_genes(self, region: GenomicRegion, bed_regions: Dict[str, List[Tuple[int, int, str]]]) -> Set[str]:
-        """Find unique genes that overlap with a given genomic region."""
-        affected_genes = set()  # Changed from list to set
-        for start, end, gene in bed_regions.get(region.chromosome, []):
-            if start <= region.end and end >= region.start:
-                affected_genes.add(gene)  # Using add instead of append
-        return affected_genes
+    def find_affected_genes(self, region: GenomicRegion, bed_regions: Dict[str, BedIntervals]) -> List[str]:
+        """Find unique genes that overlap with a given genomic region, in genomic order."""
+        index = bed_regions.get(region.chromosome)
+        if index is None:
+            return []
+        # Only intervals starting between region.start - max_length and region.end can overlap
+        lo = np.searchsorted(index.starts, region.start - index.max_length, side='left')
+        hi = np.searchsorted(index.starts, region.end, side='right')
+        overlapping = index.ends[lo:hi] >= region.start
+        # Intervals are sorted by (start, end, gene), so the selected genes are already ordered
+        return list(dict.fromkeys(index.genes[lo:hi][overlapping].tolist()))
+
+    def find_all_affected_genes(
+        self,
+        regions: List[GenomicRegion],
+        bed_regions: Dict[str, BedIntervals]
+    ) -> List[List[str]]:
+        """Find the affected genes of every region, testing each chromosome's regions
+        against its intervals in one broadcast comparison."""
+        affected: List[List[str]] = [[] for _ in regions]
+        by_chrom: Dict[str, List[int]] = {}
+        for i, region in enumerate(regions):
+            by_chrom.setdefault(region.chromosome, []).append(i)
+
+        for chrom, indices in by_chrom.items():
+            index = bed_regions.get(chrom)
+            if index is None:
+                continue
+            starts = np.array([regions[i].start for i in indices], dtype=np.int64)
+            ends = np.array([regions[i].end for i in indices], dtype=np.int64)
+            # Only intervals that can reach any of the regions take part in the comparison
+            lo = np.searchsorted(index.starts, starts.min() - index.max_length, side='left')
+            hi = np.searchsorted(index.starts, ends.max(), side='right')
+            if len(indices) == 1 or len(indices) * (hi - lo) > self.MAX_OVERLAP_MATRIX:
+                for i in indices:
+                    affected[i] = self.find_affected_genes(regions[i], bed_regions)
+                continue
+            overlap = ((index.starts[None, lo:hi] <= ends[:, None]) &
+                       (index.ends[None, lo:hi] >= starts[:, None]))
+            genes = index.genes[lo:hi]
+            for i, row in zip(indices, overlap):
+                affected[i] = list(dict.fromkeys(genes[row].tolist()))
+        return affected
 
 class ResultsWriter:
+    # Write buffer size for result files
+    IO_BUFFER = 4 << 20
+
     @staticmethod
     def save_to_csv(output_path: Path, results: List[Tuple[str, int, int, str]]):
         """Save analysis results to CSV file."""
         try:
-            with open(output_path, 'w', newline='') as csvfile:
-                writer = csv.DictWriter(csvfile, 
-                    fieldnames=['Chromosome', 'Start', 'End', 'Affected_Genes'])
-                writer.writeheader()
-                for chrom, start, end, genes in results:
-                    writer.writerow({
-                        'Chromosome': chrom,
-                        'Start': start,
-                        'End': end,
-                        'Affected_Genes': genes
-                    })
+            with open(output_path, 'w', newline='', buffering=ResultsWriter.IO_BUFFER) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(['Chromosome', 'Start', 'End', 'Affected_Genes'])
+                writer.writerows(results)
         except Exception as e:
             logging.error(f"Failed to save results to {output_path}: {e}")
             raise
 
+def analyze_one(
+    file_path: Path,
+    centromeres: CentromereTable,
+    bed_regions: Optional[Dict[str, BedIntervals]]
+) -> Tuple[Sex, List[Tuple[str, int, int, str]]]:
+    """Analyze one CNS file and build the rows of its LOH results."""
+    analyzer = LOHAnalyzer()
+    loh_regions, sex = analyzer.analyze_file(file_path, centromeres)
+
+    # Process results
+    results = []
+    if bed_regions:
+        affected = analyzer.find_all_affected_genes(loh_regions, bed_regions)
+        for region, affected_genes in zip(loh_regions, affected):
+            if affected_genes:  # Only include regions with affected genes
+                results.append((
+                    region.chromosome,
+                    region.start,
+                    region.end,
+                    ','.join(affected_genes)
+                ))
+    else:
+        for region in loh_regions:
+            results.append((
+                region.chromosome,
+                region.start,
+                region.end,
+                ''  # No genes information when BED file is not provided
+            ))
+    return sex, results
+
+# Reference data shared by pool workers, set once per process by _init_worker
+_worker_data: Dict[str, object] = {}
+
+def _init_worker(centromeres: CentromereTable, bed_regions: Optional[Dict[str, BedIntervals]]):
+    _worker_data['centromeres'] = centromeres
+    _worker_data['bed_regions'] = bed_regions
+
+def _analyze_in_worker(file_path: Path) -> Tuple[Sex, List[Tuple[str, int, int, str]]]:
+    return analyze_one(file_path, _worker_data['centromeres'], _worker_data['bed_regions'])
+
+# VarScan CNS files start with a header naming these columns first
+_CNS_HEADER = b'Chrom\tPosition\t'
+
+def _has_cns_header(path: Path) -> bool:
+    """Check whether a file starts with the header VarScan writes to CNS files."""
+    with open(path, 'rb') as f:
+        return f.readline().startswith(_CNS_HEADER)
+
 def main():
-    if len(sys.argv) < 2 or len(sys.argv) > 3:
-        logging.error("Usage: python floh.py <file_path> [<bed_file>]")
+    parser = argparse.ArgumentParser(description="Detect LOH regions in VarScan CNS files.")
+    parser.add_argument('file_paths', nargs='+', type=Path, metavar='file_path', help="VarScan CNS file")
+    parser.add_argument('--bed', type=Path, dest='bed_path', metavar='bed_file', help="BED file of genes to report")
+    args = parser.parse_args()
+    file_paths, bed_path = args.file_paths, args.bed_path
+
+    # Validate all inputs before any work starts
+    centromeres_path = Path('centromeres.json')
+    missing = [str(path) for path in [*file_paths, bed_path, centromeres_path] if path and not path.is_file()]
+    if missing:
+        logging.error(f"Input files not found: {', '.join(missing)}")
+        sys.exit(1)
+    # Catches the old 'loh.py <file_path> <bed_file>' form, which passed the BED positionally
+    not_cns = [str(path) for path in file_paths if not _has_cns_header(path)]
+    if not_cns:
+        logging.error(f"Not VarScan CNS files: {', '.join(not_cns)}; pass a BED file with --bed")
         sys.exit(1)
 
     try:
-        analyzer = LOHAnalyzer()
-        file_path = Path(sys.argv[1])
-        bed_path = Path(sys.argv[2]) if len(sys.argv) == 3 else None
-        centromeres_path = Path('centromeres.json')
-
         # Load required files
-        centromeres = analyzer.load_centromeres(centromeres_path)
-        bed_regions = analyzer.load_bed_regions(bed_path) if bed_path else None
+        centromeres = LOHAnalyzer.load_centromeres(centromeres_path)
+        bed_regions = LOHAnalyzer.load_bed_regions(bed_path) if bed_path else None
 
-        # Analyze file
-        loh_regions, sex = analyzer.analyze_file(file_path, centromeres)
+        # Analyze files, one worker process per file when there are several
+        if len(file_paths) == 1:
+            outcomes = [analyze_one(file_paths[0], centromeres, bed_regions)]
+        else:
+            processes = min(os.cpu_count() or 1, len(file_paths))
+            with mp.Pool(processes, initializer=_init_worker, initargs=(centromeres, bed_regions)) as pool:
+                outcomes = pool.map(_analyze_in_worker, file_paths)
 
-        # Process results
-        results = []
-        for region in loh_regions:
-            if 'X' not in region.chromosome and region.homozygous_count > 40 and region.confidence > 90:
-                if bed_regions:
-                    affected_genes = analyzer.find_affected_genes(region, bed_regions)
-                    if affected_genes:  # Only include regions with affected genes
-                        results.append((
-                            region.chromosome,
-                            region.start,
-                            region.end,
-                            ','.join(sorted(affected_genes))  # Sort genes for consistent output
-                        ))
-                else:
-                    results.append((
-                        region.chromosome,
-                        region.start,
-                        region.end,
-                        ''  # No genes information when BED file is not provided
-                    ))
-
-        # Save results
-        output_path = file_path.with_suffix('.loh.csv')
-        ResultsWriter.save_to_csv(output_path, results)
-
-        # Log results
-        logging.info(f"Analysis complete. Sex: {sex.value}")
-        logging.info(f"Results saved to {output_path}")
+        # Save results only once every file has been analyzed
+        for file_path, (sex, results) in zip(file_paths, outcomes):
+            output_path = file_path.with_suffix('.loh.csv')
+            ResultsWriter.save_to_csv(output_path, results)
+            logging.info(f"Analysis of {file_path} complete. Sex: {sex.value}")
+            logging.info(f"Results saved to {output_path}")
 
     except Exception as e:
         logging.error(f"Analysis failed: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     main()
\ No newline at end of file
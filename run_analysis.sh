@@ -40,6 +40,6 @@ java -jar VarScan.v2.4.6.jar pileup2cns "results/${SAMPLE}.pileup" \
     --min-var-freq 0 > "results/${SAMPLE}.cns"
 
 echo "Running LOH analysis..."
-python3 loh.py "results/${SAMPLE}.cns" "beds/R210.bed"
+python3 loh.py "results/${SAMPLE}.cns" --bed "beds/R210.bed"
 
 echo "Analysis complete. Results can be found in results/${SAMPLE}.loh.csv"
\ No newline at end of file
@@ -0,0 +1,146 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from loh import LOHAnalyzer, scan_cns
+
+HEADER = 'Chrom\tPosition\tRef\tCons\tReads1\tReads2\tVarFreq\tStrands1\n'
+CENTROMERES = {'chr1': {'centromere': 500}, 'chr2': {'centromere': None}, 'chrX': {'centromere': 300}}
+
+def row(chrom: str, pos, var_freq) -> str:
+    return f"{chrom}\t{pos}\tA\tR\t10\t10\t{var_freq}\t+\n"
+
+def rows(chrom: str, positions, var_freq) -> str:
+    return ''.join(row(chrom, pos, var_freq) for pos in positions)
+
+@pytest.fixture
+def analyzer() -> LOHAnalyzer:
+    return LOHAnalyzer(
+        min_streak=2, min_region_size=1, max_gap=1,
+        homozygous_count_threshold=1, confidence_threshold=50.0
+    )
+
+@pytest.fixture
+def centromeres(tmp_path: Path):
+    json_path = tmp_path / 'centromeres.json'
+    json_path.write_text(json.dumps(CENTROMERES))
+    return LOHAnalyzer.load_centromeres(json_path)
+
+def run_kernel(text: str, analyzer: LOHAnalyzer, centromeres):
+    """Run scan_cns with the arguments analyze_file passes and decode its output."""
+    buf = np.frombuffer(text.encode(), dtype=np.uint8)
+    regions, blocks = scan_cns(
+        buf, centromeres.names, centromeres.offsets, centromeres.positions,
+        analyzer._half_width, analyzer.max_gap,
+        analyzer.min_streak, analyzer.min_region_size,
+        analyzer.homozygous_count_threshold, analyzer.confidence_threshold
+    )
+    return (
+        [tuple(region) for region in regions.tolist()],
+        [(buf[start:end].tobytes().decode(), rows, het_rows, code)
+         for start, end, rows, het_rows, code in blocks.tolist()]
+    )
+
+def run_reference(text: str, analyzer: LOHAnalyzer):
+    """Line-by-line reference for scan_cns built on split() and float()."""
+    names = list(CENTROMERES)
+    regions, blocks = [], []
+    region = None
+    gap = 0
+
+    def close():
+        start, end, hc, tc, block, hc_left, tc_left = region
+        name = blocks[block][0]
+        centromere = CENTROMERES.get(name, {}).get('centromere') or -1
+        if (hc >= analyzer.min_streak and end - start + 1 >= analyzer.min_region_size and 'X' not in name
+                and (start < centromere < end
+                     or hc > analyzer.homozygous_count_threshold and hc / tc * 100 > analyzer.confidence_threshold)):
+            regions.append(tuple(region))
+
+    for line in text.splitlines()[1:]:
+        if not line:
+            continue
+        fields = line.strip().split('\t')
+        if len(fields) < 7:
+            raise ValueError("CNS line has fewer than 7 columns")
+        chrom, pos, var_freq = fields[0], int(fields[1]), float(fields[6].strip('%'))
+        if not blocks or blocks[-1][0] != chrom:
+            if region:
+                close()
+                region = None
+            blocks.append([chrom, 0, 0, names.index(chrom) if chrom in names else -1])
+        elif region and gap > analyzer.max_gap:
+            close()
+            region = None
+        block = blocks[-1]
+        block[1] += 1
+        if abs(var_freq - 50.0) >= analyzer._half_width:
+            if region is None:
+                region = [pos, pos, 0, 0, len(blocks) - 1, 0, 0]
+            region[1] = pos
+            region[2] += 1
+            region[3] += 1
+            gap = 0
+        else:
+            block[2] += 1
+            if region:
+                region[1] = pos
+                region[3] += 1
+                gap += 1
+        centromere = CENTROMERES.get(chrom, {}).get('centromere') or -1
+        if region and pos < centromere:
+            region[5], region[6] = region[2], region[3]
+    if region:
+        close()
+    return regions, [tuple(block) for block in blocks]
+
+VALID_FILES = {
+    'closed_by_gap': HEADER + rows('chr1', [10, 20, 30], '10%') + rows('chr1', [40, 50], '50%')
+        + rows('chr1', [60, 70, 80], '90%'),
+    'bridged_gap': HEADER + rows('chr1', [10, 20], '10%') + row('chr1', 30, '50%') + rows('chr1', [40, 50], '10%'),
+    'closed_by_chromosome': HEADER + rows('chr1', [10, 20, 30], '10%') + rows('chr2', [10, 20], '95%'),
+    'closed_by_eof': HEADER + row('chr2', 5, '50%') + rows('chr2', [10, 20, 30], '0%'),
+    'crlf': (HEADER + rows('chr1', [10, 20, 30], '10%') + row('chr1', 40, '50%')).replace('\n', '\r\n'),
+    'no_trailing_newline': (HEADER + rows('chr1', [10, 20, 30], '10%')).rstrip('\n'),
+    'header_only': HEADER,
+    'header_without_newline': HEADER.rstrip('\n'),
+    'var_freq_forms': HEADER + ''.join(
+        row('chr2', pos, var_freq) for pos, var_freq in enumerate(
+            ['12.5%', '87.25%', '35%', '35.01%', '64.99%', '65%', '50', ' 50%', '10 ', '.5%', '100.%'], 1
+        )
+    ),
+    'unsorted_repeated_block': HEADER + rows('chr1', [10, 20, 30], '10%') + rows('chr2', [10, 20], '90%')
+        + rows('chr1', [40, 50], '10%') + row('chr1', 60, '50%'),
+    'x_excluded': HEADER + rows('chrX', [10, 20, 30], '10%') + row('chrX', 40, '50%')
+        + rows('chr2', [10, 20], '10%'),
+    'centromere_span': HEADER + rows('chr1', [100, 400], '10%') + row('chr1', 450, '50%')
+        + rows('chr1', [600, 700], '10%'),
+    'below_confidence': HEADER + rows('chr2', [10, 20], '10%') + row('chr2', 30, '50%')
+        + rows('chr2', [40, 50], '50%'),
+    'unknown_chromosome': HEADER + rows('chrUn_1', [10, 20, 30], '10%'),
+}
+
+@pytest.mark.parametrize('text', VALID_FILES.values(), ids=VALID_FILES.keys())
+def test_scan_cns_matches_reference(text, analyzer, centromeres):
+    assert run_kernel(text, analyzer, centromeres) == run_reference(text, analyzer)
+
+@pytest.mark.parametrize('line, message', [
+    ('chr1\t10\tA\tR\t10\t10\n', 'fewer than 7 columns'),
+    ('chr1\t10\n', 'fewer than 7 columns'),
+    ('chr1\t1O\tA\tR\t10\t10\t10%\t+\n', 'Position'),
+    ('chr1\t\tA\tR\t10\t10\t10%\t+\n', 'Position'),
+    ('chr1\t10\tA\tR\t10\t10\t35,5%\t+\n', 'VarFreq'),
+    ('chr1\t10\tA\tR\t10\t10\t4O%\t+\n', 'VarFreq'),
+    ('chr1\t10\tA\tR\t10\t10\t%\t+\n', 'VarFreq'),
+    ('chr1\t10\tA\tR\t10\t10\t.\t+\n', 'VarFreq'),
+    ('chr1\t10\tA\tR\t10\t10\t50% \t+\n', 'VarFreq'),
+], ids=['six_columns', 'two_columns', 'letter_in_position', 'empty_position',
+        'comma_decimal', 'letter_in_var_freq', 'percent_only', 'dot_only', 'space_after_percent'])
+def test_scan_cns_rejects_malformed_lines(line, message, analyzer, centromeres):
+    text = HEADER + row('chr1', 5, '10%') + line
+    with pytest.raises(ValueError, match=message):
+        run_kernel(text, analyzer, centromeres)
+    with pytest.raises(ValueError):
+        run_reference(text, analyzer)